@@ -1,116 +1,346 @@
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
+from cachetools import TTLCache
+import msgspec
+import orjson
 import sqlite3
 import os
+import queue
+import threading
 from contextlib import contextmanager
+from datetime import datetime, timezone
+from itertools import combinations
+
+class ORJSONProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson, used by jsonify and request.get_json"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
+
+# Set USERS_DB=:memory: to keep the database in RAM for development and tests
+DATABASE = os.environ.get('USERS_DB', 'users.db')
+# Read connections kept open per process; SQLite allows a single writer anyway
+READ_POOL_SIZE = min(os.cpu_count() or 1, 8)
+
+# sqlite3 keeps a per-connection cache of prepared statements keyed by SQL
+# text, so with pooled connections identical SQL strings skip re-preparing.
+# PATCH statements are generated up front, one per combination of fields, so
+# every variant reuses a cached statement instead of building new SQL text.
+UPDATABLE_FIELDS = ('firstname', 'lastname')
+PARTIAL_UPDATE_SQL = {
+    fields: f"UPDATE users SET {', '.join(f'{field} = ?' for field in fields)}, "
+            "updated_at = unixepoch() WHERE id = ? "
+            "RETURNING id, firstname, lastname, updated_at"
+    for size in range(1, len(UPDATABLE_FIELDS) + 1)
+    for fields in combinations(UPDATABLE_FIELDS, size)
+}
+
+BULK_INSERT_CHUNK_SIZE = 1000
+
+# Serialized GET responses, invalidated on every write. Invalidation only
+# reaches this process, which is why gunicorn.conf.py runs a single worker.
+CACHE_TTL_SECONDS = 60
+_user_cache = TTLCache(maxsize=1024, ttl=CACHE_TTL_SECONDS)
+_list_cache = TTLCache(maxsize=256, ttl=CACHE_TTL_SECONDS)
+_cache_lock = threading.Lock()  # TTLCache itself is not thread-safe
+_cache_generation = 0
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def _connect(readonly):
+    """Open a connection configured for reuse across request threads"""
+    if DATABASE == ':memory:':
+        # Each plain :memory: connection gets a private database, so use a
+        # shared-cache one instead. It lives as long as a connection to it is
+        # open, which the pools guarantee for the lifetime of the process.
+        conn = sqlite3.connect('file::memory:?cache=shared', uri=True, check_same_thread=False)
+        # Shared-cache readers would otherwise hit table locks held by the writer
+        conn.execute('PRAGMA read_uncommitted=ON')
+    else:
+        conn = sqlite3.connect(DATABASE, check_same_thread=False)
+    conn.row_factory = sqlite3.Row  # Enable column access by name
+    # NORMAL is safe in WAL mode and only fsyncs at checkpoints;
+    # busy_timeout makes writers wait for the lock instead of failing
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA busy_timeout=30000')
+    # Page cache, mmap window and temp storage are per connection, so they are
+    # set here for every pooled connection. cache_size is negative for KiB;
+    # the cache only grows as pages are actually read.
+    conn.execute('PRAGMA cache_size=-65536')  # 64 MiB
+    conn.execute('PRAGMA mmap_size=268435456')  # 256 MiB
+    conn.execute('PRAGMA temp_store=MEMORY')
+    if readonly:
+        conn.execute('PRAGMA query_only=ON')
+    return conn
+
+def _get_pool(readonly):
+    """Lazily create the read or write pool so DATABASE can be set before first use"""
+    with _pools_lock:
+        if readonly not in _pools:
+            size = READ_POOL_SIZE if readonly else 1
+            pool = queue.Queue(maxsize=size)
+            for _ in range(size):
+                pool.put(_connect(readonly))
+            _pools[readonly] = pool
+        return _pools[readonly]
 
 # Database connection management using context manager pattern
-# This ensures proper cleanup and prevents connection leaks
+# Write endpoints nest `with conn:` inside it so each request runs as one
+# transaction that commits once on success and rolls back on errors.
+# Connections are borrowed from a process-wide pool instead of being opened
+# per request, which avoids reopening the database files on every call
 @contextmanager
-def get_db_connection():
-    """Context manager for database connections - ensures proper cleanup"""
-    conn = sqlite3.connect('users.db')
-    conn.row_factory = sqlite3.Row  # Enable column access by name
+def get_db_connection(readonly=False):
+    """Context manager that borrows a pooled connection and always returns it"""
+    pool = _get_pool(readonly)
+    conn = pool.get()
     try:
         yield conn
+    except BaseException:
+        if not readonly:
+            # In :memory: mode readers use read_uncommitted, so they may have
+            # cached rows from the write that was just rolled back
+            _clear_cache()
+        raise
     finally:
-        conn.close()
+        conn.rollback()  # Discard uncommitted work before the next borrower
+        pool.put(conn)
+
+def _cache_get(cache, key):
+    """Return the cached body (or None) and the generation to pass to _cache_put"""
+    with _cache_lock:
+        return cache.get(key), _cache_generation
+
+def _cache_put(cache, key, body, generation):
+    """Store a body unless a write invalidated the cache while it was being built"""
+    with _cache_lock:
+        if generation == _cache_generation:
+            cache[key] = body
+
+def _invalidate_cache(user_id=None):
+    """Drop cached responses that a write may have made stale"""
+    global _cache_generation
+    with _cache_lock:
+        _cache_generation += 1
+        if user_id is not None:
+            _user_cache.pop(user_id, None)
+        _list_cache.clear()
+
+def _clear_cache():
+    """Drop every cached response, for when the affected users are unknown"""
+    global _cache_generation
+    with _cache_lock:
+        _cache_generation += 1
+        _user_cache.clear()
+        _list_cache.clear()
+
+def _cached_response(body):
+    return app.response_class(body, status=200, mimetype='application/json')
+
+USERS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        firstname TEXT NOT NULL,
+        lastname TEXT NOT NULL,
+        created_at INTEGER DEFAULT (unixepoch()),
+        updated_at INTEGER DEFAULT (unixepoch())
+    )
+'''
 
 def init_db():
     with get_db_connection() as conn:
+        # WAL lets readers proceed while a writer is active. The setting is
+        # persistent, so it only needs to be applied once per database file.
+        if DATABASE != ':memory:':
+            conn.execute('PRAGMA journal_mode=WAL')
         cursor = conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                firstname TEXT NOT NULL,
-                lastname TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        cursor.execute(USERS_TABLE_SQL.format(table='users'))
         conn.commit()
+        _migrate_text_timestamps(conn)
 
-def validate_user_data(data, required_fields=None):
-    """Centralized validation function for reusability and maintainability"""
-    if not data:
-        return False, 'No data provided'
+def _migrate_text_timestamps(conn):
+    """
+    Convert databases created with TEXT CURRENT_TIMESTAMP columns to integer
+    Unix timestamps. SQLite can't change a column's default in place, so the
+    table is rebuilt in a single transaction.
+    """
+    columns = {row['name']: row['type'] for row in conn.execute('PRAGMA table_info(users)')}
+    if columns['created_at'] == 'INTEGER':
+        return
     
-    if required_fields:
-        missing_fields = [field for field in required_fields if field not in data]
-        if missing_fields:
-            return False, f'Missing required fields: {", ".join(missing_fields)}'
+    with conn:
+        conn.execute('BEGIN')
+        # Keep the AUTOINCREMENT counter so ids of deleted users aren't reused
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'users'").fetchone()
+        conn.execute(USERS_TABLE_SQL.format(table='users_new'))
+        conn.execute('''
+            INSERT INTO users_new (id, firstname, lastname, created_at, updated_at)
+            SELECT id, firstname, lastname,
+                   CASE typeof(created_at) WHEN 'text' THEN unixepoch(created_at) ELSE created_at END,
+                   CASE typeof(updated_at) WHEN 'text' THEN unixepoch(updated_at) ELSE updated_at END
+            FROM users
+        ''')
+        conn.execute('DROP TABLE users')
+        conn.execute('ALTER TABLE users_new RENAME TO users')
+        if row is not None:
+            conn.execute("DELETE FROM sqlite_sequence WHERE name = 'users'")
+            conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('users', ?)", (row['seq'],))
+
+# Request body schemas - msgspec decodes and validates the raw JSON in one
+# pass, so handlers never see an unchecked dict
+def _strip_names(user):
+    """Strip names once on decode and reject ones that end up empty"""
+    for field in UPDATABLE_FIELDS:
+        value = getattr(user, field)
+        if value is msgspec.UNSET:
+            continue
+        value = value.strip()
+        if not value:
+            raise ValueError(f'{field} must be a non-empty string')
+        setattr(user, field, value)
+
+class UserIn(msgspec.Struct):
+    firstname: str
+    lastname: str
     
-    # Validate field types and constraints
-    if 'firstname' in data and (not isinstance(data['firstname'], str) or not data['firstname'].strip()):
-        return False, 'firstname must be a non-empty string'
+    __post_init__ = _strip_names
+
+class UserPatch(msgspec.Struct):
+    firstname: str | msgspec.UnsetType = msgspec.UNSET
+    lastname: str | msgspec.UnsetType = msgspec.UNSET
     
-    if 'lastname' in data and (not isinstance(data['lastname'], str) or not data['lastname'].strip()):
-        return False, 'lastname must be a non-empty string'
+    __post_init__ = _strip_names
+
+user_decoder = msgspec.json.Decoder(UserIn)
+user_patch_decoder = msgspec.json.Decoder(UserPatch)
+user_list_decoder = msgspec.json.Decoder(list[UserIn])
+
+def decode_user_data(decoder):
+    """Centralized decoding and validation of the request body"""
+    body = request.get_data()
+    if not body:
+        return None, 'No data provided'
     
-    return True, None
+    try:
+        return decoder.decode(body), None
+    except msgspec.DecodeError as e:  # Also covers msgspec.ValidationError
+        return None, str(e)
 
-def user_exists(user_id):
-    """Check if user exists in database"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute('SELECT id FROM users WHERE id = ?', (user_id,))
-        return cursor.fetchone() is not None
+def format_timestamp(value):
+    """Format a stored Unix timestamp as ISO 8601 for the JSON response"""
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, tz=timezone.utc).isoformat()
 
 @app.route('/api/users', methods=['POST'])
 def add_user():
     """Create a new user - demonstrates proper error handling and validation"""
-    data = request.get_json()
-    
     # Validate required fields
-    is_valid, error_msg = validate_user_data(data, required_fields=['firstname', 'lastname'])
-    if not is_valid:
+    user, error_msg = decode_user_data(user_decoder)
+    if error_msg:
         return jsonify({'error': error_msg}), 400
     
     try:
-        with get_db_connection() as conn:
+        with get_db_connection() as conn, conn:
             cursor = conn.cursor()
+            # RETURNING also hands back the defaulted timestamp without a SELECT
             cursor.execute(
-                'INSERT INTO users (firstname, lastname) VALUES (?, ?)',
-                (data['firstname'].strip(), data['lastname'].strip())
+                'INSERT INTO users (firstname, lastname) VALUES (?, ?) RETURNING id, created_at',
+                (user.firstname, user.lastname)
             )
-            conn.commit()
-            user_id = cursor.lastrowid
+            user_id, created_at = cursor.fetchone()
+        _invalidate_cache()
             
         return jsonify({
             'id': user_id, 
             'message': 'User created successfully',
             'user': {
                 'id': user_id,
-                'firstname': data['firstname'].strip(),
-                'lastname': data['lastname'].strip()
+                'firstname': user.firstname,
+                'lastname': user.lastname,
+                'created_at': format_timestamp(created_at)
             }
         }), 201
         
     except sqlite3.Error as e:
         return jsonify({'error': 'Database error occurred'}), 500
 
+@app.route('/api/users/bulk', methods=['POST'])
+def bulk_add_users():
+    """
+    Create many users in one request
+    
+    Educational Insight: With SQLite the commit, not the INSERT, dominates the
+    cost of a write. Inserting every row inside one transaction pays that cost
+    once instead of once per user.
+    """
+    # Everything is validated up front so a bad entry doesn't leave a partial import
+    users, error_msg = decode_user_data(user_list_decoder)
+    if error_msg:
+        return jsonify({'error': error_msg}), 400
+    
+    if not users:
+        return jsonify({'error': 'Expected a non-empty list of users'}), 400
+    
+    rows = [(user.firstname, user.lastname) for user in users]
+    
+    try:
+        with get_db_connection() as conn, conn:
+            cursor = conn.cursor()
+            # Chunks bound the size of each executemany call; they all share
+            # the one transaction opened implicitly by the first INSERT
+            for start in range(0, len(rows), BULK_INSERT_CHUNK_SIZE):
+                cursor.executemany(
+                    'INSERT INTO users (firstname, lastname) VALUES (?, ?)',
+                    rows[start:start + BULK_INSERT_CHUNK_SIZE]
+                )
+        _invalidate_cache()
+            
+        return jsonify({
+            'message': 'Users created successfully',
+            'created': len(rows)
+        }), 201
+        
+    except sqlite3.Error as e:
+        return jsonify({'error': 'Database error occurred'}), 500
+
 @app.route('/api/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
     """Retrieve a specific user - essential for a complete CRUD API"""
+    body, generation = _cache_get(_user_cache, user_id)
+    if body is not None:
+        return _cached_response(body)
+    
     try:
-        with get_db_connection() as conn:
+        with get_db_connection(readonly=True) as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
+            cursor.execute(
+                'SELECT id, firstname, lastname, created_at, updated_at FROM users WHERE id = ?',
+                (user_id,)
+            )
             user = cursor.fetchone()
             
         if not user:
             return jsonify({'error': 'User not found'}), 404
             
-        return jsonify({
+        response = jsonify({
             'user': {
                 'id': user['id'],
                 'firstname': user['firstname'],
                 'lastname': user['lastname'],
-                'created_at': user['created_at'],
-                'updated_at': user['updated_at']
+                'created_at': format_timestamp(user['created_at']),
+                'updated_at': format_timestamp(user['updated_at'])
             }
-        }), 200
+        })
+        _cache_put(_user_cache, user_id, response.get_data(), generation)
+        return response, 200
         
     except sqlite3.Error as e:
         return jsonify({'error': 'Database error occurred'}), 500
@@ -124,35 +354,30 @@ def update_user_full(user_id):
     This endpoint requires all fields to be provided, following REST conventions.
     Use PUT when you want to completely replace a resource.
     """
-    if not user_exists(user_id):
-        return jsonify({'error': 'User not found'}), 404
-    
-    data = request.get_json()
-    
     # For PUT, require all fields as we're replacing the entire resource
-    is_valid, error_msg = validate_user_data(data, required_fields=['firstname', 'lastname'])
-    if not is_valid:
+    user, error_msg = decode_user_data(user_decoder)
+    if error_msg:
         return jsonify({'error': error_msg}), 400
     
     try:
-        with get_db_connection() as conn:
+        with get_db_connection() as conn, conn:
             cursor = conn.cursor()
             cursor.execute('''
                 UPDATE users 
-                SET firstname = ?, lastname = ?, updated_at = CURRENT_TIMESTAMP
+                SET firstname = ?, lastname = ?, updated_at = unixepoch()
                 WHERE id = ?
-            ''', (data['firstname'].strip(), data['lastname'].strip(), user_id))
-            conn.commit()
+            ''', (user.firstname, user.lastname, user_id))
             
             if cursor.rowcount == 0:
                 return jsonify({'error': 'User not found'}), 404
+        _invalidate_cache(user_id)
                 
         return jsonify({
             'message': 'User updated successfully',
             'user': {
                 'id': user_id,
-                'firstname': data['firstname'].strip(),
-                'lastname': data['lastname'].strip()
+                'firstname': user.firstname,
+                'lastname': user.lastname
             }
         }), 200
         
@@ -168,43 +393,39 @@ def update_user_partial(user_id):
     This is ideal for scenarios where clients only want to update specific fields
     without affecting others. More efficient for large resources and better UX.
     
-    Design Pattern: This demonstrates the partial update pattern with dynamic
-    SQL generation based on provided fields.
+    Design Pattern: This demonstrates the partial update pattern, picking one
+    of the precomputed statements based on the provided fields.
     """
-    if not user_exists(user_id):
-        return jsonify({'error': 'User not found'}), 404
-    
-    data = request.get_json()
-    
     # For PATCH, validate provided fields but don't require all fields
-    is_valid, error_msg = validate_user_data(data)
-    if not is_valid:
+    patch, error_msg = decode_user_data(user_patch_decoder)
+    if error_msg:
         return jsonify({'error': error_msg}), 400
     
-    # Check if at least one valid field is provided
-    valid_fields = ['firstname', 'lastname']
-    update_fields = {k: v.strip() for k, v in data.items() if k in valid_fields}
+    # Check if at least one valid field is provided (kept in canonical order
+    # so the matching precomputed statement can be looked up)
+    update_fields = {
+        k: getattr(patch, k)
+        for k in UPDATABLE_FIELDS
+        if getattr(patch, k) is not msgspec.UNSET
+    }
     
     if not update_fields:
         return jsonify({'error': 'No valid fields provided for update'}), 400
     
     try:
-        # Dynamic SQL generation for partial updates
-        set_clause = ', '.join([f'{field} = ?' for field in update_fields.keys()])
-        sql = f'UPDATE users SET {set_clause}, updated_at = CURRENT_TIMESTAMP WHERE id = ?'
+        sql = PARTIAL_UPDATE_SQL[tuple(update_fields)]
         values = list(update_fields.values()) + [user_id]
         
-        with get_db_connection() as conn:
+        with get_db_connection() as conn, conn:
             cursor = conn.cursor()
+            # RETURNING hands back the updated row, so no follow-up SELECT is
+            # needed and the request commits a single statement
             cursor.execute(sql, values)
-            conn.commit()
+            updated_user = cursor.fetchone()
             
-            if cursor.rowcount == 0:
+            if updated_user is None:
                 return jsonify({'error': 'User not found'}), 404
-            
-            # Fetch updated user data to return complete information
-            cursor.execute('SELECT * FROM users WHERE id = ?', (user_id,))
-            updated_user = cursor.fetchone()
+        _invalidate_cache(user_id)
             
         return jsonify({
             'message': 'User updated successfully',
@@ -213,7 +434,7 @@ def update_user_partial(user_id):
                 'id': updated_user['id'],
                 'firstname': updated_user['firstname'],
                 'lastname': updated_user['lastname'],
-                'updated_at': updated_user['updated_at']
+                'updated_at': format_timestamp(updated_user['updated_at'])
             }
         }), 200
         
@@ -230,13 +451,13 @@ def delete_user(user_id):
     resources is acceptable but not required).
     """
     try:
-        with get_db_connection() as conn:
+        with get_db_connection() as conn, conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM users WHERE id = ?', (user_id,))
-            conn.commit()
             
             if cursor.rowcount == 0:
                 return jsonify({'error': 'User not found'}), 404
+        _invalidate_cache(user_id)
                 
         return jsonify({'message': 'User deleted successfully'}), 200
         
@@ -251,38 +472,90 @@ def list_users():
     Educational Insight: Always implement pagination for list endpoints
     to prevent performance issues as data grows. This is a scalability
     best practice often overlooked in simple implementations.
+    
+    Clients should prefer keyset pagination by passing the returned
+    next_cursor as after_id: the query seeks straight to the next id via
+    the primary key, whereas OFFSET has to skip every earlier row. The
+    page parameter is kept as a fallback for existing clients.
     """
     # Pagination parameters
     page = request.args.get('page', 1, type=int)
-    per_page = min(request.args.get('per_page', 10, type=int), 100)  # Cap at 100
-    offset = (page - 1) * per_page
+    per_page = max(1, min(request.args.get('per_page', 10, type=int), 100))  # 1 to 100
+    after_id = request.args.get('after_id', type=int)
+    if after_id is not None:
+        # Page numbers don't apply when seeking by id, so they are reported
+        # as null and kept out of the cache key
+        page = None
+        offset = 0
+    else:
+        offset = (page - 1) * per_page
+    
+    cache_key = (page, per_page, after_id)
+    body, generation = _cache_get(_list_cache, cache_key)
+    if body is not None:
+        return _cached_response(body)
     
     try:
-        with get_db_connection() as conn:
+        with get_db_connection(readonly=True) as conn:
             cursor = conn.cursor()
+            # Plain tuples are cheaper to build than sqlite3.Row objects and
+            # are turned straight into the response dicts below
+            cursor.row_factory = None
             
-            # Get total count for pagination metadata
-            cursor.execute('SELECT COUNT(*) FROM users')
-            total_count = cursor.fetchone()[0]
-            
-            # Get paginated results
-            cursor.execute('''
-                SELECT id, firstname, lastname, created_at, updated_at 
-                FROM users 
-                ORDER BY id 
-                LIMIT ? OFFSET ?
-            ''', (per_page, offset))
+            if after_id is not None:
+                # Keyset pagination; the WHERE clause would limit a window
+                # count, so the total comes from a one-off scalar subquery
+                cursor.execute('''
+                    SELECT id, firstname, lastname, created_at, updated_at,
+                           (SELECT COUNT(*) FROM users) AS total
+                    FROM users 
+                    WHERE id > ?
+                    ORDER BY id 
+                    LIMIT ?
+                ''', (after_id, per_page))
+            else:
+                # Get paginated results together with the total count; the window
+                # function returns the count on every row in the same pass
+                cursor.execute('''
+                    SELECT id, firstname, lastname, created_at, updated_at,
+                           COUNT(*) OVER () AS total
+                    FROM users 
+                    ORDER BY id 
+                    LIMIT ? OFFSET ?
+                ''', (per_page, offset))
             users = cursor.fetchall()
             
-        return jsonify({
-            'users': [dict(user) for user in users],
+            if users:
+                total_count = users[0][5]
+            elif offset or after_id is not None:
+                # Page past the end returns no rows to carry the count
+                cursor.execute('SELECT COUNT(*) FROM users')
+                total_count = cursor.fetchone()[0]
+            else:
+                total_count = 0
+            
+        response = jsonify({
+            'users': [
+                {
+                    'id': user[0],
+                    'firstname': user[1],
+                    'lastname': user[2],
+                    'created_at': format_timestamp(user[3]),
+                    'updated_at': format_timestamp(user[4])
+                }
+                for user in users
+            ],
             'pagination': {
                 'page': page,
                 'per_page': per_page,
                 'total': total_count,
-                'pages': (total_count + per_page - 1) // per_page
+                'pages': None if page is None else (total_count + per_page - 1) // per_page,
+                # A short page means there is nothing left to fetch
+                'next_cursor': users[-1][0] if users and len(users) == per_page else None
             }
-        }), 200
+        })
+        _cache_put(_list_cache, cache_key, response.get_data(), generation)
+        return response, 200
         
     except sqlite3.Error as e:
         return jsonify({'error': 'Database error occurred'}), 500
@@ -302,5 +575,6 @@ def internal_error(error):
 
 if __name__ == '__main__':
     init_db()
-    # Enable debug mode for development - disable in production
+    # Enable debug mode for development only - in production run `gunicorn`
+    # instead, which uses the settings in gunicorn.conf.py
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
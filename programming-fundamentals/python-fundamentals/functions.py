@@ -1,9 +1,49 @@
+from statistics import StatisticsError, fmean
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; only the plain loop is used then
+    njit = None
+
 def calculate_average(numbers):
-    """Calculate the average of a list of numbers."""
-    return sum(numbers) / len(numbers)
+    """Calculate the average of a list of numbers.
+
+    NumPy arrays are averaged by NumPy, which uses pairwise summation.
+    Any other iterable goes through statistics.fmean, which sums with
+    exact rounding in C, so mixed magnitudes don't lose precision.
+    Both raise ValueError when there are no numbers.
+    """
+    if isinstance(numbers, np.ndarray):
+        if numbers.size == 0:
+            raise ValueError("calculate_average requires at least one number")
+        return float(numbers.mean())
+    try:
+        return fmean(numbers)
+    except StatisticsError:
+        raise ValueError("calculate_average requires at least one number") from None
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _sum_with_loop(numbers):
+        total = 0.0
+        for i in range(numbers.shape[0]):
+            total += numbers[i]
+        return total
+else:
+    _sum_with_loop = None
 
 def calculate_average_with_loop(numbers):
-    """Calculate the average of a list of numbers using a loop."""
+    """Calculate the average of a list of numbers using a loop.
+
+    NumPy arrays are summed by a loop compiled with Numba when it is
+    installed; everything else uses the plain Python loop.
+    """
+    if _sum_with_loop is not None and isinstance(numbers, np.ndarray):
+        numbers = numbers.astype(np.float64, copy=False)
+        return float(_sum_with_loop(numbers)) / numbers.shape[0]
+    
     total = 0
     count = 0
     for num in numbers:
@@ -13,14 +53,24 @@ def calculate_average_with_loop(numbers):
 
 
 class User:
+    # Fixed slots instead of a per-instance __dict__ keep instances small
+    __slots__ = ('first_name', 'last_name', '_full_name')
+
     def __init__(self, first_name: str, last_name: str):
      
         self.first_name = str(first_name)
         self.last_name = str(last_name)
+        self._full_name = None
     
     @property
     def full_name(self) -> str:
-        return f"{self.first_name} {self.last_name}"
+        """The formatted name, cached together with the names it was built from."""
+        first_name, last_name = self.first_name, self.last_name
+        cached = self._full_name
+        # Rebuild if either name was reassigned since the last access
+        if cached is None or cached[0] is not first_name or cached[1] is not last_name:
+            cached = self._full_name = (first_name, last_name, f"{first_name} {last_name}")
+        return cached[2]
     
     def to_dict(self) -> dict:
        
@@ -0,0 +1,16 @@
+# Production server settings, picked up automatically by running `gunicorn`
+# from this directory. The threads share the worker's connection pool, so
+# reads run in parallel on SQLite's WAL while writes stay on the single
+# pooled writer connection. Keep a single worker: the response caches in
+# api.py are per process and are only invalidated by the worker handling
+# the write, so a second worker could serve stale reads.
+wsgi_app = 'api:app'
+bind = '0.0.0.0:5000'
+worker_class = 'gthread'
+workers = 1
+threads = 8
+
+def post_worker_init(worker):
+    # Runs after the fork so every worker opens its own SQLite connections
+    from api import init_db
+    init_db()
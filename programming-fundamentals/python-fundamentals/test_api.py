@@ -0,0 +1,131 @@
+import pytest
+import api
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Test client backed by a fresh shared in-memory database."""
+    monkeypatch.setattr(api, "DATABASE", ":memory:")
+    api.init_db()
+    yield api.app.test_client()
+    # Closing every pooled connection drops the in-memory database
+    for pool in api._pools.values():
+        while not pool.empty():
+            pool.get().close()
+    api._pools.clear()
+    api._clear_cache()
+
+def create_user(client, firstname="John", lastname="Doe"):
+    response = client.post("/api/users", json={"firstname": firstname, "lastname": lastname})
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+def test_create_and_get_user(client):
+    """Test that a created user can be read back with stripped names."""
+    user_id = create_user(client, "  Ada ", " Lovelace")
+    response = client.get(f"/api/users/{user_id}")
+    assert response.status_code == 200
+    user = response.get_json()["user"]
+    assert user["firstname"] == "Ada"
+    assert user["lastname"] == "Lovelace"
+
+def test_missing_user_returns_404(client):
+    """Test that every single-user endpoint reports a missing id."""
+    assert client.get("/api/users/99").status_code == 404
+    assert client.put("/api/users/99", json={"firstname": "A", "lastname": "B"}).status_code == 404
+    assert client.patch("/api/users/99", json={"firstname": "A"}).status_code == 404
+    assert client.delete("/api/users/99").status_code == 404
+
+def test_invalid_user_data_returns_400(client):
+    """Test that blank or missing names are rejected."""
+    assert client.post("/api/users", json={"firstname": "  ", "lastname": "Doe"}).status_code == 400
+    assert client.post("/api/users", json={"firstname": "John"}).status_code == 400
+    assert client.patch("/api/users/1", json={}).status_code == 400
+
+def test_get_after_put_is_not_stale(client):
+    """Test that a cached user is invalidated by a full update."""
+    user_id = create_user(client)
+    client.get(f"/api/users/{user_id}")
+    client.put(f"/api/users/{user_id}", json={"firstname": "Jane", "lastname": "Smith"})
+    user = client.get(f"/api/users/{user_id}").get_json()["user"]
+    assert (user["firstname"], user["lastname"]) == ("Jane", "Smith")
+
+def test_get_after_patch_is_not_stale(client):
+    """Test that cached user and list responses are invalidated by a partial update."""
+    user_id = create_user(client)
+    client.get(f"/api/users/{user_id}")
+    client.get("/api/users")
+    client.patch(f"/api/users/{user_id}", json={"lastname": "Smith"})
+    assert client.get(f"/api/users/{user_id}").get_json()["user"]["lastname"] == "Smith"
+    assert client.get("/api/users").get_json()["users"][0]["lastname"] == "Smith"
+
+def test_get_after_delete_is_not_stale(client):
+    """Test that a deleted user is no longer served from the cache."""
+    user_id = create_user(client)
+    client.get(f"/api/users/{user_id}")
+    client.get("/api/users")
+    assert client.delete(f"/api/users/{user_id}").status_code == 200
+    assert client.get(f"/api/users/{user_id}").status_code == 404
+    assert client.get("/api/users").get_json()["pagination"]["total"] == 0
+
+def test_list_after_create_is_not_stale(client):
+    """Test that creating a user invalidates cached list pages."""
+    create_user(client)
+    assert client.get("/api/users").get_json()["pagination"]["total"] == 1
+    create_user(client)
+    assert client.get("/api/users").get_json()["pagination"]["total"] == 2
+
+def test_cache_put_skipped_after_invalidation():
+    """Test that a response built before a write is not cached after it."""
+    _, generation = api._cache_get(api._user_cache, 1)
+    api._invalidate_cache(1)
+    api._cache_put(api._user_cache, 1, b"stale", generation)
+    assert api._cache_get(api._user_cache, 1)[0] is None
+
+def test_rolled_back_write_clears_cache(client):
+    """Test that rows read from a rolled-back write don't stay cached."""
+    user_id = create_user(client)
+    with pytest.raises(RuntimeError):
+        with api.get_db_connection() as conn, conn:
+            conn.execute("UPDATE users SET firstname = 'Dirty' WHERE id = ?", (user_id,))
+            # In :memory: mode readers see uncommitted rows, so this gets cached
+            assert client.get(f"/api/users/{user_id}").get_json()["user"]["firstname"] == "Dirty"
+            raise RuntimeError
+    assert client.get(f"/api/users/{user_id}").get_json()["user"]["firstname"] == "John"
+
+def test_bulk_insert(client):
+    """Test that a valid bulk request creates every user."""
+    users = [{"firstname": f"User{i}", "lastname": "Bulk"} for i in range(5)]
+    response = client.post("/api/users/bulk", json=users)
+    assert response.status_code == 201
+    assert response.get_json()["created"] == 5
+    assert client.get("/api/users").get_json()["pagination"]["total"] == 5
+
+def test_bulk_insert_is_all_or_nothing(client):
+    """Test that one bad entry rejects the whole bulk request."""
+    users = [{"firstname": "Good", "lastname": "User"}, {"firstname": "Bad"}]
+    assert client.post("/api/users/bulk", json=users).status_code == 400
+    assert client.post("/api/users/bulk", json=[]).status_code == 400
+    assert client.get("/api/users").get_json()["pagination"]["total"] == 0
+
+def test_keyset_pagination_to_end(client):
+    """Test following next_cursor until the last page."""
+    client.post("/api/users/bulk", json=[{"firstname": f"User{i}", "lastname": "X"} for i in range(5)])
+    seen = []
+    response = client.get("/api/users?per_page=2").get_json()
+    seen += [user["id"] for user in response["users"]]
+    while response["pagination"]["next_cursor"] is not None:
+        cursor = response["pagination"]["next_cursor"]
+        response = client.get(f"/api/users?per_page=2&after_id={cursor}").get_json()
+        assert response["pagination"]["page"] is None
+        seen += [user["id"] for user in response["users"]]
+    assert seen == [1, 2, 3, 4, 5]
+
+def test_per_page_is_clamped(client):
+    """Test that zero or negative page sizes don't break pagination."""
+    create_user(client)
+    create_user(client)
+    for query in ("per_page=0", "per_page=-5", "per_page=0&after_id=1"):
+        response = client.get(f"/api/users?{query}")
+        assert response.status_code == 200
+        assert len(response.get_json()["users"]) == 1
@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 from functions import calculate_average, calculate_average_with_loop, User
 
@@ -7,12 +8,46 @@ def test_calculate_average():
     assert calculate_average([1.5, 2.5, 3.5]) == 2.5
     assert calculate_average([42]) == 42.0
 
+def test_calculate_average_is_exactly_rounded():
+    """Test that large and small values don't cancel each other out."""
+    assert calculate_average([1e16, 1.0, -1e16]) == 1 / 3
+    assert calculate_average(x for x in [1, 2, 3]) == 2.0
+
+def test_calculate_average_numpy_array():
+    """Test that NumPy arrays are accepted directly."""
+    assert calculate_average(np.array([1, 2, 3, 4, 5])) == 3.0
+    assert calculate_average(np.array([1.5, 2.5, 3.5])) == 2.5
+    assert isinstance(calculate_average(np.array([42])), float)
+
+def test_calculate_average_empty():
+    """Test that empty lists and arrays fail the same way."""
+    with pytest.raises(ValueError):
+        calculate_average([])
+    with pytest.raises(ValueError):
+        calculate_average(np.array([]))
+
 def test_calculate_average_with_loop():
     """Test the full_name property."""
     assert calculate_average_with_loop([1, 2, 3, 4, 5]) == 3.0
     assert calculate_average_with_loop([1.5, 2.5, 3.5]) == 2.5
     assert calculate_average_with_loop([42]) == 42.0
 
+def test_calculate_average_with_loop_generator():
+    """Test that any iterable works, not just sequences."""
+    assert calculate_average_with_loop(x for x in [1, 2, 3]) == 2.0
+
+def test_calculate_average_with_loop_numpy_array():
+    """Test that NumPy arrays are accepted directly."""
+    assert calculate_average_with_loop(np.array([1, 2, 3, 4, 5])) == 3.0
+    assert calculate_average_with_loop(np.array([1.5, 2.5, 3.5])) == 2.5
+
+def test_calculate_average_with_loop_compiles_with_numba():
+    """Test that arrays go through the Numba-compiled loop when Numba is installed."""
+    pytest.importorskip("numba")
+    from numba.core.dispatcher import Dispatcher
+    from functions import _sum_with_loop
+    assert isinstance(_sum_with_loop, Dispatcher)
+
 # User class tests
 def test_user_creation():
     """Test basic user creation with constructor."""
@@ -25,6 +60,14 @@ def test_user_full_name():
     user = User("John", "Doe")
     assert user.full_name == "John Doe"
 
+def test_user_full_name_follows_name_changes():
+    """Test that the cached full_name is rebuilt after a name changes."""
+    user = User("John", "Doe")
+    assert user.full_name == "John Doe"
+    user.last_name = "Smith"
+    assert user.full_name == "John Smith"
+    assert not hasattr(user, "__dict__")
+
 def test_user_to_dict():
     """Test conversion to dictionary format."""
     user = User("John", "Doe")